@@ -1,12 +1,18 @@
 import streamlit as st
 import pymongo
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import uuid
+import io
+import json
+import hashlib
+import stat
+import os
 from datetime import datetime
-from collections import Counter
 
 # MongoDB Configuration
 @st.cache_resource
@@ -15,15 +21,88 @@ def init_connection():
     try:
         # Get MongoDB URI from environment variable or Streamlit secrets
         mongo_uri = st.secrets["MONGODB_URI"]
-        client = pymongo.MongoClient(mongo_uri)
-        return client
+        # Small pool for a single Streamlit process; compress wire traffic for the full-collection reads
+        client = pymongo.MongoClient(
+            mongo_uri,
+            maxPoolSize=20,
+            minPoolSize=2,
+            compressors='zstd,zlib',
+            serverSelectionTimeoutMS=2000,
+            socketTimeoutMS=10000,
+            retryReads=True
+        )
     except Exception as e:
         st.error(f"Failed to connect to MongoDB: {e}")
         return None
+    
+    try:
+        # Serves the timestamp range match in get_data(since=...); create_index is a no-op when the index exists
+        collection = client.employee_survey.responses
+        collection.create_index([('timestamp', pymongo.ASCENDING)])
+    except Exception as e:
+        st.warning(f"Could not create MongoDB indexes: {e}")
+    
+    return client
+
+# On-disk copy of the last full fetch, so a cold start can skip re-reading every document.
+# It holds every answer, so it lives in a private directory rather than the shared temp dir
+SNAPSHOT_FILE = 'responses.parquet'
+SNAPSHOT_KEY_FIELD = b'myvoice_snapshot_key'
+
+def _snapshot_dir(create=False):
+    """Return the app's own snapshot directory inside SNAPSHOT_DIR, creating it when asked"""
+    base_dir = st.secrets.get("SNAPSHOT_DIR", os.path.join(os.path.expanduser('~'), '.cache'))
+    snapshot_dir = os.path.join(base_dir, 'myvoice_survey')
+    if create and not os.path.lexists(snapshot_dir):
+        os.makedirs(base_dir, exist_ok=True)
+        os.mkdir(snapshot_dir, 0o700)
+    # Never change permissions on an existing directory; just refuse one that isn't private to this user
+    info = os.lstat(snapshot_dir)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.geteuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{snapshot_dir} is not a private directory owned by this app")
+    return snapshot_dir
+
+def _snapshot_key():
+    """Fingerprint the data source and layout the snapshot was written from"""
+    source = json.dumps([st.secrets["MONGODB_URI"], 'employee_survey', 'responses', *_QUESTION_IDS, *_CUSTOM_COLUMNS])
+    return hashlib.sha256(source.encode('utf-8')).hexdigest().encode('ascii')
+
+def _read_snapshot(expected_rows):
+    """Load the Parquet snapshot if it matches this data source and holds the expected number of rows"""
+    try:
+        snapshot_path = os.path.join(_snapshot_dir(), SNAPSHOT_FILE)
+        if not os.path.exists(snapshot_path):
+            return None
+        metadata = pq.read_metadata(snapshot_path)
+        if metadata.num_rows != expected_rows or (metadata.metadata or {}).get(SNAPSHOT_KEY_FIELD) != _snapshot_key():
+            return None
+        return pd.read_parquet(snapshot_path, engine='pyarrow')
+    except Exception:
+        # A missing or unreadable snapshot just means fetching from MongoDB
+        return None
+
+def _write_snapshot(df):
+    """Save the fetched responses as a Parquet snapshot"""
+    tmp_path = None
+    try:
+        snapshot_path = os.path.join(_snapshot_dir(create=True), SNAPSHOT_FILE)
+        tmp_path = f"{snapshot_path}.tmp"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SNAPSHOT_KEY_FIELD: _snapshot_key()})
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, snapshot_path)
+    except Exception as e:
+        st.warning(f"Could not save the response snapshot: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
-@st.cache_data
-def get_data():
-    """Fetch data from MongoDB"""
+@st.cache_data(ttl=60)
+def get_data(since=None):
+    """Fetch flattened responses from MongoDB, optionally only those submitted on or after `since`"""
     client = init_connection()
     if client is None:
         return pd.DataFrame()
@@ -31,133 +110,149 @@ def get_data():
     try:
         db = client.employee_survey
         collection = db.responses
-        data = list(collection.find({}, {'_id': 0}))
-        return pd.DataFrame(data)
+        
+        # Responses are insert-only, so an unchanged document count means the snapshot is current
+        if since is None:
+            doc_count = collection.estimated_document_count()
+            snapshot = _read_snapshot(doc_count)
+            if snapshot is not None:
+                return snapshot
+        
+        query = {'timestamp': {'$gte': since}} if since is not None else {}
+        # Flatten the known question fields server-side so documents arrive as flat rows
+        projection = {'_id': 0, 'session_id': 1, 'timestamp': 1}
+        projection.update({qid: f"$responses.{qid}" for qid in _QUESTION_IDS})
+        projection.update({f"{qid}_custom": f"$custom_responses.{qid}" for qid in _QUESTION_IDS})
+        pipeline = [{'$match': query}, {'$project': projection}]
+        columns = ['session_id', 'timestamp', *_QUESTION_IDS, *_CUSTOM_COLUMNS]
+        cursor = collection.aggregate(pipeline, batchSize=5000)
+        df = pd.DataFrame.from_records(cursor, columns=columns)
+        # Parse timestamps once here so downstream code can use .dt directly
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce')
+        if since is None and not df.empty:
+            _write_snapshot(df)
+        return df
     except Exception as e:
         st.error(f"Failed to fetch data: {e}")
         return pd.DataFrame()
 
+@st.cache_data(ttl=30)
+def get_response_total():
+    """Get the number of stored responses from collection metadata"""
+    client = init_connection()
+    if client is None:
+        return 0
+    
+    try:
+        return client.employee_survey.responses.estimated_document_count()
+    except Exception as e:
+        st.error(f"Failed to count responses: {e}")
+        return 0
+
+@st.cache_data(ttl=30)
+def get_response_counts():
+    """Count responses per question and option, plus the exact response total, with a MongoDB aggregation"""
+    client = init_connection()
+    if client is None:
+        return pd.DataFrame(), 0
+    
+    try:
+        db = client.employee_survey
+        collection = db.responses
+        # Group each known question separately; the result is one small document of counts.
+        # The exact total comes from the same pass so percentages use a matching denominator
+        facets = {qid: [{'$group': {'_id': f"${qid}", 'n': {'$sum': 1}}}] for qid in _QUESTION_IDS}
+        facets['_total'] = [{'$count': 'n'}]
+        pipeline = [
+            {'$project': {qid: f"$responses.{qid}" for qid in _QUESTION_IDS}},
+            {'$facet': facets}
+        ]
+        result = next(collection.aggregate(pipeline), {})
+        total = result.pop('_total', [])
+        counts = pd.DataFrame({
+            qid: {group['_id']: group['n'] for group in groups if group['_id'] is not None}
+            for qid, groups in result.items()
+        }).T
+        return counts.fillna(0).astype('int32'), (total[0]['n'] if total else 0)
+    except Exception as e:
+        st.error(f"Failed to fetch response counts: {e}")
+        return pd.DataFrame(), 0
+
+@st.cache_data(ttl=60)
+def get_daily_counts():
+    """Count responses per day with a MongoDB aggregation"""
+    client = init_connection()
+    if client is None:
+        return pd.Series(dtype=int)
+    
+    try:
+        db = client.employee_survey
+        collection = db.responses
+        pipeline = [
+            {'$match': {'timestamp': {'$type': 'date'}}},
+            {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}}, 'n': {'$sum': 1}}},
+            {'$sort': {'_id': 1}}
+        ]
+        counts = pd.DataFrame.from_records(collection.aggregate(pipeline))
+        if counts.empty:
+            return pd.Series(dtype=int)
+        return pd.Series(counts['n'].to_numpy(), index=pd.to_datetime(counts['_id']))
+    except Exception as e:
+        st.error(f"Failed to fetch daily response counts: {e}")
+        return pd.Series(dtype=int)
+
 # Survey Questions and Options
-SURVEY_QUESTIONS = {
-    "Q1_Retention_Transformation": {
-        "question": "How are you feeling about all these changes happening at the bank? Are they making you want to stay or think about leaving?",
-        "options": {
-            "A": "Pretty excited about it! The changes make sense, I know where I fit, and I can see some good opportunities coming my way",
-            "B": "Cautiously optimistic - I get the direction we're going, but I'd love more clarity on timelines and what exactly my role will look like",
-            "C": "A bit worried but still hopeful - Concerned about job security and the extra workload, but I think it'll work out if we get better communication",
-            "D": "Honestly considering other options - The uncertainty and impact on my work-life balance is really making me think about looking elsewhere"
-        }
-    },
-    "Q2_Workload_Stress": {
-        "question": "Let's talk about your workload - are you managing okay with everything on your plate right now?",
-        "options": {
-            "A": "It's all good! My workload feels reasonable, deadlines are doable, and my manager has my back",
-            "B": "It's pretty intense but I'm handling it - could use some flexibility on deadlines when things get crazy busy though",
-            "C": "I'm struggling to keep up - working long hours regularly, missing deadlines, and could really use some help with prioritizing",
-            "D": "It's honestly unsustainable - the pressure is affecting my health and personal life, something needs to change ASAP"
-        }
-    },
-    "Q3_Decision_Making": {
-        "question": "How's the decision-making around here? Do things move at a reasonable pace or are you stuck waiting for answers a lot?",
-        "options": {
-            "A": "Pretty smooth actually - decisions happen in reasonable time and we usually understand the 'why' behind them",
-            "B": "Sometimes we wait longer than we'd like, but we eventually get there - more regular updates would be nice",
-            "C": "Lots of waiting around - weeks for simple decisions, causing delays and having to redo work because priorities changed",
-            "D": "It's a real problem - the delays are causing major issues, missed opportunities, and everyone's getting frustrated"
-        }
-    },
-    "Q4_Input_Involvement": {
-        "question": "When changes are happening that affect your work, do you feel like anyone actually listens to what you have to say?",
-        "options": {
-            "A": "Absolutely! I'm regularly asked for input and can see my suggestions actually being used in the final decisions",
-            "B": "Sometimes they ask, but I'm not always sure what happens with my feedback - would love to know how it's being used",
-            "C": "Rarely get asked, and when I am, it feels like the decision was already made anyway",
-            "D": "Never really consulted - just get told about changes after they're decided, which is frustrating given my experience"
-        }
-    },
-    "Q5_Performance_Recognition": {
-        "question": "Do you feel like your hard work gets recognized fairly, especially compared to your teammates?",
-        "options": {
-            "A": "Yes, the process feels fair and transparent - my contributions get the recognition they deserve",
-            "B": "Mostly fair, though I'd appreciate more specific feedback and clearer criteria for what gets recognized",
-            "C": "I notice some inconsistency - similar work seems to get different levels of recognition depending on who did it",
-            "D": "Not really - I feel undervalued compared to my peers, and the whole process lacks transparency"
-        }
-    },
-    "Q6_Personal_Growth": {
-        "question": "Is your manager actually helping you grow in your career, especially with all the changes happening?",
-        "options": {
-            "A": "Definitely! We regularly talk about my development, and they're actively helping me navigate my career path",
-            "B": "We have some development conversations, but they could be more frequent and focused on specific skills I need",
-            "C": "Not really much happening - our development discussions are pretty rare and don't go very deep",
-            "D": "Honestly, no - we hardly ever talk about my growth, and it feels like development has taken a backseat to everything else"
-        }
-    },
-    "Q7_Tools_Resources": {
-        "question": "Do you have what you need to do your job well, or are you constantly working around missing tools and resources?",
-        "options": {
-            "A": "I'm all set! Have everything I need to do my job effectively, plus good tech support when I need it",
-            "B": "Pretty well equipped, but there are some tools or upgrades that would definitely make my work easier and better",
-            "C": "Missing quite a few things I need - causes delays and I'm constantly finding workarounds, which slows me down",
-            "D": "It's a real struggle - lacking basic tools and resources that seriously impact my ability to do quality work"
-        }
-    },
-    "Q8_Follow_up_Accountability": {
-        "question": "Thinking about what management promised after last year's survey - did they actually follow through on those commitments?",
-        "options": {
-            "A": "They really delivered! Most of what they promised actually happened, I can see real improvements, and I trust the process",
-            "B": "Mixed bag - some things were done well, others not so much, but I still generally believe they're trying",
-            "C": "Not much changed despite all the promises - starting to wonder if this survey actually leads to anything",
-            "D": "Pretty disappointed - most commitments weren't delivered as promised, and honestly, I'm losing faith in the whole process"
-        }
-    },
-    "Q9_Work_Environment": {
-        "question": "What would make the biggest difference in making this a better place to work day-to-day?",
-        "options": {
-            "A": "It's already pretty good! The culture and team dynamics are supportive - just minor tweaks needed",
-            "B": "Better collaboration would help - we need improved communication between teams and more inclusive decision-making",
-            "C": "Some serious culture issues to fix - too much blame, office politics, or people not feeling safe to speak up",
-            "D": "Major problems here - the culture is really toxic and affecting everyone's morale and well-being"
-        }
-    },
-    "Q10_Open_Communication": {
-        "question": "Can you speak up when you disagree with something or have concerns, or do you keep quiet to avoid trouble?",
-        "options": {
-            "A": "I feel totally comfortable speaking up about anything - leadership actually encourages different viewpoints",
-            "B": "Usually comfortable, but sometimes I hold back on sensitive topics - a bit more encouragement would help",
-            "C": "Depends on the topic and who I'm talking to - wish it felt more consistently safe to share honest opinions",
-            "D": "I keep quiet most of the time - worried about negative consequences or getting in trouble for speaking up"
-        }
-    },
-    "Q11_AI_Future_Readiness": {
-        "question": "How do you feel about all this AI stuff coming into our work? Excited, nervous, or somewhere in between?",
-        "options": {
-            "A": "Bring it on! I'm excited about the possibilities and feel ready to adapt to whatever tech changes come our way",
-            "B": "Interested and see the potential, but I'll definitely need some training and support to feel confident with it",
-            "C": "A bit nervous but willing to learn - just need comprehensive training and ongoing support to keep up",
-            "D": "Pretty worried about being left behind - concerned these changes will make my current skills irrelevant"
-        }
-    },
-    "Q12_Most_Important_Action": {
-        "question": "If you could wave a magic wand and change one thing to make your work experience better, what would it be?",
-        "options": {
-            "A": "Better communication - more transparency about what's happening, why decisions are made, and how changes affect me personally",
-            "B": "Fix the work-life balance - realistic workloads, better time management, and actual support for managing stress",
-            "C": "Invest in our people - more focus on training, career development, and helping us navigate all these changes",
-            "D": "Actually listen to us - take real action on employee feedback and consistently follow through on promises"
-        }
-    }
+@st.cache_resource
+def load_survey_questions():
+    """Load survey questions and options from the bundled JSON file"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'survey_questions.json')
+    with open(path, 'rb') as f:
+        return json.loads(f.read())
+
+# Parsed once per process rather than re-evaluated on every script rerun
+SURVEY_QUESTIONS = load_survey_questions()
+
+# The question list is fixed, so analysis columns never need to be discovered dynamically
+_QUESTION_IDS = tuple(SURVEY_QUESTIONS)
+_CUSTOM_COLUMNS = tuple(f"{qid}_custom" for qid in _QUESTION_IDS)
+
+# Per-question widget data, built once per script run instead of inside the form loop
+_OPTIONS_LIST = {qid: tuple(q['options']) + ('Other (please specify)',) for qid, q in SURVEY_QUESTIONS.items()}
+_LABELS = {
+    qid: {**{k: f"{k}: {v}" for k, v in q['options'].items()}, 'Other (please specify)': 'Other (please specify)'}
+    for qid, q in SURVEY_QUESTIONS.items()
 }
+_QUESTION_NUMBERS = {qid: qid.split('_')[0][1:] for qid in SURVEY_QUESTIONS}
+_QUESTION_HEADERS = {
+    qid: f"### Question {_QUESTION_NUMBERS[qid]}\n\n**{q['question']}**" for qid, q in SURVEY_QUESTIONS.items()
+}
+
+# Every stored answer is one of the option letters or "Other"
+RESPONSE_DTYPE = pd.CategoricalDtype(['A', 'B', 'C', 'D', 'Other'])
 
-def save_response(response_data):
+# Point counts above which line charts switch to WebGL and drop hover lookups
+_WEBGL_THRESHOLD = 1000
+_HOVER_THRESHOLD = 10_000
+
+def save_response(response_data, client=None):
     """Save survey response to MongoDB"""
-    client = init_connection()
+    if client is None:
+        client = init_connection()
     if client is None:
         return False
     
     try:
         db = client.employee_survey
-        collection = db.responses
+        # Without either setting, inserts use the collection's default write concern (majority on replica sets)
+        write_concern = None
+        if st.secrets.get("FAST_INSERT", False):
+            # Fire-and-forget: no round-trip wait, but a failed insert goes unnoticed
+            write_concern = pymongo.WriteConcern(w=0)
+        elif st.secrets.get("PRIMARY_ACK_INSERT", False):
+            # Acknowledged by the primary alone; faster, but a failover can roll the insert back
+            write_concern = pymongo.WriteConcern(w=1, j=False)
+        collection = db.get_collection('responses', write_concern=write_concern)
         collection.insert_one(response_data)
         return True
     except Exception as e:
@@ -169,6 +264,10 @@ def survey_form():
     st.header("🎯 2026 My Voice Employee Survey")
     st.write("Your feedback matters! Please be honest - this is completely anonymous and confidential. If none of the options fit exactly, feel free to type your own response.")
     
+    # Look up the cached client once per session rather than on every submit
+    if 'mongo' not in st.session_state:
+        st.session_state['mongo'] = init_connection()
+    
     with st.form("employee_survey"):
         # Generate unique session ID
         session_id = str(uuid.uuid4())[:8]
@@ -179,17 +278,14 @@ def survey_form():
         custom_responses = {}
         
         # Display all questions
-        for question_id, question_data in SURVEY_QUESTIONS.items():
-            st.subheader(f"Question {question_id.split('_')[0][1:]}")
-            st.write(f"**{question_data['question']}**")
+        for question_id in SURVEY_QUESTIONS:
+            st.markdown(_QUESTION_HEADERS[question_id])
             
             # Create radio buttons with options + "Other" option
-            options_list = list(question_data["options"].keys()) + ["Other (please specify)"]
-            
             selected_option = st.radio(
                 "Choose your response:",
-                options=options_list,
-                format_func=lambda x: f"{x}: {question_data['options'][x]}" if x in question_data["options"] else x,
+                options=_OPTIONS_LIST[question_id],
+                format_func=_LABELS[question_id].__getitem__,
                 key=question_id
             )
             
@@ -207,10 +303,6 @@ def survey_form():
                 responses[question_id] = selected_option
                 custom_responses[question_id] = ""
             
-            # Show selected option description
-            if selected_option in question_data["options"]:
-                st.caption(f"💭 {question_data['options'][selected_option]}")
-            
             st.write("---")
         
         # Submit button
@@ -221,7 +313,7 @@ def survey_form():
             validation_error = False
             for question_id, response in responses.items():
                 if response == "Other" and not custom_responses[question_id].strip():
-                    st.error(f"⚠️ Please provide your custom response for Question {question_id.split('_')[0][1:]}")
+                    st.error(f"⚠️ Please provide your custom response for Question {_QUESTION_NUMBERS[question_id]}")
                     validation_error = True
             
             if not validation_error:
@@ -234,131 +326,203 @@ def survey_form():
                 }
                 
                 # Save to MongoDB
-                if save_response(response_data):
-                    st.success(f"✅ Thank you! Your response has been recorded successfully!")
-                    st.success(f"📋 Session ID: **{session_id}** (for your records)")
-                    st.balloons()
-                    
-                    # Show thank you message
-                    st.info("🙏 Your feedback is valuable and will help improve our workplace. Feel free to share any additional thoughts with your manager or HR team.")
-                    
-                    # Note about starting new survey
-                    st.info("💡 To start another survey, simply refresh the page or click 'New Survey' in the sidebar.")
+                if save_response(response_data, st.session_state['mongo']):
+                    # Single message instead of a series of separate alerts
+                    st.success(
+                        f"✅ Thank you! Your response has been recorded successfully!\n\n"
+                        f"📋 Session ID: **{session_id}** (for your records)\n\n"
+                        "🙏 Your feedback is valuable and will help improve our workplace. Feel free to share any additional thoughts with your manager or HR team.\n\n"
+                        "💡 To start another survey, simply refresh the page or click 'New Survey' in the sidebar."
+                    )
+                    if st.session_state.get('show_balloons', False):
+                        st.balloons()
                 else:
                     st.error("❌ Oops! Something went wrong. Please try submitting again.")
 
-def create_response_distribution_chart(df, question_id):
-    """Create a pie chart for response distribution"""
-    if question_id not in df.columns:
-        return None
+def create_response_distribution_chart(vc_row, question_id):
+    """Create a bar chart for response distribution from one row of option counts"""
+    total = vc_row.sum()
+    percentages = (vc_row / total * 100) if total > 0 else vc_row * 0
+    
+    fig = go.Figure(go.Bar(
+        x=vc_row.index.to_numpy(),
+        y=vc_row.to_numpy(),
+        text=vc_row.values,
+        textposition='outside',
+        customdata=percentages.values,
+        hovertemplate='<b>%{x}</b><br>Count: %{y}<br>Percentage: %{customdata:.1f}%<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=f"Response Distribution - {question_id.replace('_', ' ').title()}",
+        bargap=0.3
+    )
     
-    response_counts = df[question_id].value_counts()
+    return fig
+
+def create_overall_sentiment_chart(vc):
+    """Create overall sentiment analysis chart"""
+    # Define positive responses (A and B options generally indicate better sentiment)
+    counts = vc[['A', 'B', 'C', 'D']].to_numpy()
+    positive_counts = counts[:, :2].sum(axis=1)
+    negative_counts = counts[:, 2:].sum(axis=1)
+    
+    sentiment_counts = np.array([
+        (positive_counts > negative_counts).sum(),
+        (positive_counts == negative_counts).sum(),
+        (negative_counts > positive_counts).sum()
+    ], dtype=np.int32)
+    
+    fig = go.Figure(go.Bar(
+        x=['Positive Areas', 'Neutral Areas', 'Areas of Concern'],
+        y=sentiment_counts,
+        marker=dict(color=['#2E8B57', '#FFD700', '#DC143C'])
+    ))
+    
+    fig.update_layout(
+        title='Overall Survey Sentiment Analysis',
+        xaxis_title='Sentiment',
+        yaxis_title='Count'
+    )
     
-    fig = px.pie(
-        values=response_counts.values,
-        names=response_counts.index,
-        title=f"Response Distribution - {question_id.replace('_', ' ').title()}"
+    return fig
+
+def create_priority_chart(sorted_concerns):
+    """Create horizontal bar chart of concern level per question"""
+    # Numeric numpy arrays are sent to the browser as compact typed arrays
+    fig = go.Figure(go.Bar(
+        x=sorted_concerns.to_numpy(dtype=np.float32),
+        y=sorted_concerns.index.to_numpy(),
+        orientation='h',
+        marker_color='lightcoral'
+    ))
+    
+    fig.update_layout(
+        title='Areas Requiring Immediate Attention (% of Concerning Responses)',
+        xaxis_title='Concern Level (%)',
+        yaxis_title='Survey Questions'
     )
     
-    fig.update_traces(
-        textposition='inside',
-        textinfo='percent+label',
-        hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>'
+    return fig
+
+def create_trends_chart(daily_responses):
+    """Create line chart of responses per day"""
+    fig = px.line(
+        x=daily_responses.index,
+        y=daily_responses.values,
+        title='Survey Responses Over Time',
+        labels={'x': 'Date', 'y': 'Number of Responses'},
+        render_mode='webgl' if len(daily_responses) >= _WEBGL_THRESHOLD else 'svg'
     )
+    fig.update_layout(hovermode='x unified' if len(daily_responses) < _HOVER_THRESHOLD else False)
     
     return fig
 
-def create_overall_sentiment_chart(df):
-    """Create overall sentiment analysis chart"""
-    # Define positive responses (A and B options generally indicate better sentiment)
-    positive_questions = []
-    neutral_questions = []
-    negative_questions = []
-    
-    for col in df.columns:
-        if col.startswith('Q') and '_' in col:
-            positive_count = len(df[df[col].isin(['A', 'B'])])
-            negative_count = len(df[df[col].isin(['C', 'D'])])
-            
-            if positive_count > negative_count:
-                positive_questions.append(col)
-            elif negative_count > positive_count:
-                negative_questions.append(col)
-            else:
-                neutral_questions.append(col)
+@st.cache_data(ttl=300)
+def build_analysis_df(data_key, _raw):
+    """Prepare flattened survey responses and mark which custom responses were filled in"""
+    # Cached on data_key only - the leading underscore stops Streamlit hashing the raw frame
+    analysis_df = _raw.reset_index(drop=True)
+    
+    # Store answers as small integer codes rather than Python strings
+    q_cols = [qid for qid in _QUESTION_IDS if qid in analysis_df.columns]
+    analysis_df[q_cols] = analysis_df[q_cols].astype(RESPONSE_DTYPE)
+    
+    # Only keep non-empty custom responses
+    cust_cols = [col for col in _CUSTOM_COLUMNS if col in analysis_df.columns]
+    if cust_cols:
+        analysis_df.loc[:, cust_cols] = analysis_df[cust_cols].where(
+            analysis_df[cust_cols].apply(lambda s: s.astype(str).str.strip().ne(''))
+        )
+        empty_cols = [col for col in cust_cols if analysis_df[col].isna().all()]
+        analysis_df = analysis_df.drop(columns=empty_cols)
     
-    sentiment_data = {
-        'Sentiment': ['Positive Areas', 'Neutral Areas', 'Areas of Concern'],
-        'Count': [len(positive_questions), len(neutral_questions), len(negative_questions)],
-        'Color': ['#2E8B57', '#FFD700', '#DC143C']
-    }
+    # Empty custom responses are already NaN, so one notna pass marks the filled-in ones
+    custom_mask = analysis_df[[col for col in _CUSTOM_COLUMNS if col in analysis_df.columns]].notna()
     
-    fig = px.bar(
-        sentiment_data,
-        x='Sentiment',
-        y='Count',
-        color='Color',
-        title='Overall Survey Sentiment Analysis',
-        color_discrete_map={color: color for color in sentiment_data['Color']}
+    return analysis_df, custom_mask
+
+@st.cache_data(ttl=300)
+def compute_question_aggregates(response_counts, response_total):
+    """Derive per-question concern levels and the headline metrics from option counts"""
+    # Keep survey questions in their original order with every option present
+    vc = response_counts.reindex(
+        index=[qid for qid in _QUESTION_IDS if qid in response_counts.index],
+        columns=['A', 'B', 'C', 'D', 'Other'],
+        fill_value=0
     )
     
-    return fig
+    # C and D responses indicate concern; rank highest concern first
+    concern_scores = vc[['C', 'D']].sum(axis=1) / response_total * 100
+    concern_scores = concern_scores.iloc[np.argsort(-concern_scores.to_numpy(), kind='stable')]
+    
+    total_responses = response_total * len(_QUESTION_IDS)
+    kpis = {
+        'retention_concern_pct': concern_scores.get('Q1_Retention_Transformation', 0),
+        'high_stress_pct': concern_scores.get('Q2_Workload_Stress', 0),
+        'satisfaction_pct': (vc['A'].sum() / total_responses) * 100 if total_responses > 0 else 0
+    }
+    
+    return vc, concern_scores, kpis
+
+@st.cache_data(ttl=300, max_entries=4)
+def build_csv(csv_key, _frame):
+    """Serialize a DataFrame to CSV bytes for download"""
+    # Cached on csv_key only, so the frame itself is never hashed; each entry is a full copy of the
+    # CSV, so only the last few filter selections are kept
+    buf = io.BytesIO()
+    _frame.to_csv(buf, index=False, chunksize=10000)
+    return buf.getvalue()
 
 def analytics_dashboard():
     """Display analytics dashboard"""
     st.header("📊 Survey Analytics Dashboard")
     
-    # Load data
-    df = get_data()
+    # The header total comes from collection metadata, so it renders without loading any documents.
+    # It is only an estimate, so percentages below divide by the exact total from the counts aggregation
+    total_count = get_response_total()
     
-    if df.empty:
+    if total_count == 0:
         st.warning("⚠️ No survey data available yet. Complete some surveys first!")
         return
     
-    # Flatten responses for analysis
-    flattened_data = []
-    for _, row in df.iterrows():
-        flat_row = {
-            'session_id': row['session_id'],
-            'timestamp': row['timestamp']
-        }
-        flat_row.update(row['responses'])
-        # Add custom responses with _custom suffix
-        if 'custom_responses' in row:
-            for key, value in row['custom_responses'].items():
-                if value and value.strip():  # Only add non-empty custom responses
-                    flat_row[f"{key}_custom"] = value
-        flattened_data.append(flat_row)
-    
-    analysis_df = pd.DataFrame(flattened_data)
+    # Option counts are aggregated by MongoDB rather than re-tallied here
+    option_counts, response_total = get_response_counts()
+    vc, concern_scores, kpis = compute_question_aggregates(option_counts, response_total)
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Responses", len(analysis_df))
+        st.metric("Total Responses", total_count)
     
     with col2:
-        # Calculate retention concern (Q1 responses C and D indicate concern)
-        retention_concern = len(analysis_df[analysis_df['Q1_Retention_Transformation'].isin(['C', 'D'])])
-        retention_concern_pct = (retention_concern / len(analysis_df)) * 100 if len(analysis_df) > 0 else 0
-        st.metric("Retention Concern", f"{retention_concern_pct:.1f}%")
+        # Retention concern (Q1 responses C and D indicate concern)
+        st.metric("Retention Concern", f"{kpis['retention_concern_pct']:.1f}%")
     
     with col3:
-        # Calculate stress level (Q2 responses C and D indicate high stress)
-        high_stress = len(analysis_df[analysis_df['Q2_Workload_Stress'].isin(['C', 'D'])])
-        high_stress_pct = (high_stress / len(analysis_df)) * 100 if len(analysis_df) > 0 else 0
-        st.metric("High Stress Level", f"{high_stress_pct:.1f}%")
+        # Stress level (Q2 responses C and D indicate high stress)
+        st.metric("High Stress Level", f"{kpis['high_stress_pct']:.1f}%")
     
     with col4:
-        # Calculate satisfaction (average of A responses across all questions)
-        total_responses = len(analysis_df) * 12  # 12 questions
-        a_responses = sum([len(analysis_df[analysis_df[col] == 'A']) for col in analysis_df.columns if col.startswith('Q')])
-        satisfaction_pct = (a_responses / total_responses) * 100 if total_responses > 0 else 0
-        st.metric("Overall Satisfaction", f"{satisfaction_pct:.1f}%")
+        # Satisfaction (average of A responses across all questions)
+        st.metric("Overall Satisfaction", f"{kpis['satisfaction_pct']:.1f}%")
     
     st.write("---")
     
+    # Load data for the custom response and raw data views
+    df = get_data()
+    
+    if df.empty:
+        # The collection has responses (checked above), so an empty frame means the fetch failed
+        st.warning("⚠️ Survey responses could not be loaded right now. The figures above come from collection counts; please try again shortly.")
+        return
+    
+    # Prepare responses for analysis (cached between reruns)
+    # A new submission changes the row count or the latest timestamp, which makes a cheap cache key
+    data_key = (len(df), df['timestamp'].max())
+    analysis_df, custom_mask = build_analysis_df(data_key, df)
+    
     # Tabs for different analyses
     tab1, tab2, tab3, tab4 = st.tabs(["📈 Question Analysis", "🎯 Priority Areas", "📅 Trends", "📋 Raw Data"])
     
@@ -366,22 +530,24 @@ def analytics_dashboard():
         st.subheader("Individual Question Analysis")
         
         # Question selector
-        question_options = [col for col in analysis_df.columns if col.startswith('Q')]
+        question_options = [qid for qid in _QUESTION_IDS if qid in analysis_df.columns]
         selected_question = st.selectbox("Select Question to Analyze:", question_options)
         
         if selected_question:
-            # Create pie chart
-            fig = create_response_distribution_chart(analysis_df, selected_question)
-            if fig:
+            # Create distribution chart from the precomputed counts
+            if selected_question in vc.index:
+                fig = create_response_distribution_chart(vc.loc[selected_question], selected_question)
                 st.plotly_chart(fig, use_container_width=True)
             
-            # Show detailed breakdown
+            # Show detailed breakdown from the same precomputed counts
             st.subheader("Response Breakdown")
-            response_counts = analysis_df[selected_question].value_counts()
+            response_counts = vc.loc[selected_question] if selected_question in vc.index else pd.Series(dtype=int)
+            response_counts = response_counts[response_counts > 0]
             question_data = SURVEY_QUESTIONS[selected_question]
             
             for option, count in response_counts.items():
-                percentage = (count / len(analysis_df)) * 100
+                # Same denominator as the header metrics and priority scores
+                percentage = (count / response_total) * 100
                 if option == "Other":
                     st.write(f"**Option {option}** ({percentage:.1f}%): Custom responses (see Raw Data tab for details)")
                     # Show some custom responses if available
@@ -398,64 +564,37 @@ def analytics_dashboard():
             
             # Custom responses analysis
             custom_col = f"{selected_question}_custom"
-            if custom_col in analysis_df.columns:
-                custom_count = len(analysis_df[analysis_df[custom_col].notna() & (analysis_df[custom_col] != "")])
+            if custom_col in custom_mask.columns:
+                custom_count = int(custom_mask[custom_col].sum())
                 if custom_count > 0:
                     with st.expander(f"📝 View All Custom Responses ({custom_count} responses)"):
-                        custom_responses = analysis_df[analysis_df[custom_col].notna() & (analysis_df[custom_col] != "")][custom_col]
-                        for i, response in enumerate(custom_responses, 1):
-                            st.write(f"**{i}.** {response}")
-                            st.write("---")
+                        custom_responses = analysis_df.loc[custom_mask[custom_col], custom_col]
+                        # One table instead of two elements per response; long text can be expanded in the grid
+                        responses_table = custom_responses.to_frame('Custom Response').reset_index(drop=True)
+                        responses_table.index += 1
+                        st.dataframe(responses_table, use_container_width=True)
     
     with tab2:
         st.subheader("Priority Areas for Action")
         
-        # Calculate concern levels for each question
-        concern_scores = {}
-        for col in analysis_df.columns:
-            if col.startswith('Q'):
-                # Count C and D responses as concerns
-                concern_count = len(analysis_df[analysis_df[col].isin(['C', 'D'])])
-                concern_scores[col] = (concern_count / len(analysis_df)) * 100
-        
-        # Sort by concern level
-        sorted_concerns = sorted(concern_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        # Create bar chart
-        concern_df = pd.DataFrame(sorted_concerns, columns=['Question', 'Concern_Level'])
-        fig = px.bar(
-            concern_df,
-            x='Concern_Level',
-            y='Question',
-            orientation='h',
-            title='Areas Requiring Immediate Attention (% of Concerning Responses)',
-            labels={'Concern_Level': 'Concern Level (%)', 'Question': 'Survey Questions'}
-        )
-        fig.update_traces(marker_color='lightcoral')
+        # Create bar chart (concern scores are already ranked highest first)
+        fig = create_priority_chart(concern_scores)
         st.plotly_chart(fig, use_container_width=True)
         
         # Show top concerns
         st.subheader("Top 5 Areas of Concern")
-        for i, (question, score) in enumerate(sorted_concerns[:5], 1):
+        for i, (question, score) in enumerate(concern_scores.head(5).items(), 1):
             question_title = SURVEY_QUESTIONS[question]["question"][:100] + "..."
             st.write(f"{i}. **{question}** ({score:.1f}% concern): {question_title}")
     
     with tab3:
         st.subheader("Response Trends Over Time")
         
-        if 'timestamp' in analysis_df.columns:
-            # Convert timestamp to date
-            analysis_df['date'] = pd.to_datetime(analysis_df['timestamp']).dt.date
-            
-            # Responses over time
-            daily_responses = analysis_df.groupby('date').size()
-            
-            fig = px.line(
-                x=daily_responses.index,
-                y=daily_responses.values,
-                title='Survey Responses Over Time',
-                labels={'x': 'Date', 'y': 'Number of Responses'}
-            )
+        # Responses over time, bucketed by day in MongoDB
+        daily_responses = get_daily_counts()
+        
+        if not daily_responses.empty:
+            fig = create_trends_chart(daily_responses)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Timestamp data not available for trend analysis.")
@@ -463,48 +602,50 @@ def analytics_dashboard():
     with tab4:
         st.subheader("Raw Survey Data")
         
-        # Display filters
-        col1, col2 = st.columns(2)
+        # Display the full data with custom responses; the grid's own search and sorting work in the browser
+        st.dataframe(
+            analysis_df,
+            use_container_width=True,
+            column_config={
+                'session_id': st.column_config.TextColumn("Session ID"),
+                'timestamp': st.column_config.DatetimeColumn("Timestamp")
+            }
+        )
         
-        with col1:
-            if 'timestamp' in analysis_df.columns:
-                date_range = st.date_input(
-                    "Filter by Date Range",
-                    value=(analysis_df['timestamp'].min().date(), analysis_df['timestamp'].max().date())
-                )
+        # Show summary of custom responses if any
+        if not custom_mask.empty:
+            total_custom = int(custom_mask.to_numpy().sum())
+            
+            if total_custom > 0:
+                st.info(f"📝 **{total_custom}** custom responses found in this dataset. Custom responses are shown in columns ending with '_custom'")
         
-        with col2:
+        # Download option; the filters only narrow the exported CSV, which is cached per selection
+        with st.expander("📥 Export"):
             session_filter = st.multiselect(
-                "Filter by Session ID",
+                "Sessions to export",
                 options=analysis_df['session_id'].unique(),
                 default=analysis_df['session_id'].unique()
             )
-        
-        # Apply filters
-        filtered_df = analysis_df[analysis_df['session_id'].isin(session_filter)]
-        
-        # Display data with custom responses
-        st.dataframe(filtered_df, use_container_width=True)
-        
-        # Show summary of custom responses if any
-        custom_columns = [col for col in filtered_df.columns if col.endswith('_custom')]
-        if custom_columns:
-            total_custom = 0
-            for col in custom_columns:
-                custom_count = len(filtered_df[filtered_df[col].notna() & (filtered_df[col] != "")])
-                total_custom += custom_count
+            export_mask = analysis_df['session_id'].isin(session_filter)
             
-            if total_custom > 0:
-                st.info(f"📝 **{total_custom}** custom responses found in this dataset. Custom responses are shown in columns ending with '_custom'")
-        
-        # Download option
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Data as CSV",
-            data=csv,
-            file_name=f"survey_responses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+            date_range = ()
+            timestamps = analysis_df['timestamp']
+            if timestamps.notna().any():
+                full_range = (timestamps.min().date(), timestamps.max().date())
+                date_range = st.date_input("Dates to export (UTC)", value=full_range)
+                # Only narrow once both ends are picked and differ from the full range, so undated rows stay by default
+                if len(date_range) == 2 and tuple(date_range) != full_range:
+                    start = pd.Timestamp(date_range[0], tz='UTC')
+                    end = pd.Timestamp(date_range[1], tz='UTC') + pd.Timedelta(days=1)
+                    export_mask &= (timestamps >= start) & (timestamps < end)
+            
+            filtered_df = analysis_df[export_mask]
+            st.download_button(
+                label="📥 Download Data as CSV",
+                data=build_csv((data_key, tuple(session_filter), tuple(date_range)), filtered_df),
+                file_name=f"survey_responses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv"
+            )
 
 def main():
     """Main application"""
@@ -528,6 +669,7 @@ def main():
     if page == "📝 New Survey":
         if st.sidebar.button("🔄 Start Fresh Survey", type="secondary"):
             st.experimental_rerun()
+        st.sidebar.checkbox("🎈 Celebrate submissions", key="show_balloons")
     
     if page == "📝 New Survey":
         survey_form()